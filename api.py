@@ -265,8 +265,9 @@
 
 
 
-import math
 import itertools
+import functools
+import orjson
 from flask import Flask, request, jsonify
 
 app = Flask(__name__)
@@ -286,24 +287,37 @@ DISTANCES = {
 }
 
 CENTERS = ["C1", "C2", "C3"]
-EPSILON = 1e-9
-
-def get_distance(loc1, loc2):
-    if loc1 == loc2:
-        return 0.0
-    return DISTANCES.get((loc1, loc2), DISTANCES.get((loc2, loc1), float('inf')))
-
-def calculate_segment_cost(weight, distance):
-    if distance <= 0 or distance == float('inf'):
-        return 0.0
-    if weight <= EPSILON:
-        cost_per_km = 10
-    elif weight <= 5 + EPSILON:
-        cost_per_km = 10
-    else:
-        extra = math.ceil((weight - 5) / 5)
-        cost_per_km = 10 + (8 * extra)
-    return cost_per_km * distance
+INF = float('inf')
+
+# Locations are indexed as integers so distances and weights are plain sequence lookups.
+LOCATIONS = CENTERS + ["L1"]
+LOC_IDX = {loc: i for i, loc in enumerate(LOCATIONS)}
+L1_IDX = LOC_IDX["L1"]
+
+# Flat per-field views of PRODUCTS for the request handler.
+PRODUCT_CENTER = {code: LOC_IDX[info["center"]] for code, info in PRODUCTS.items()}
+PRODUCT_WEIGHT = {code: info["weight"] for code, info in PRODUCTS.items()}
+
+DIST = [[INF] * len(LOCATIONS) for _ in LOCATIONS]
+for i in range(len(LOCATIONS)):
+    DIST[i][i] = 0.0
+for (a, b), d in DISTANCES.items():
+    DIST[LOC_IDX[a]][LOC_IDX[b]] = d
+    DIST[LOC_IDX[b]][LOC_IDX[a]] = d
+# Floyd-Warshall: legs without a direct road (C1 <-> C3) take the shortest indirect path.
+# For a fixed carried load cost is proportional to distance, so shortest is also cheapest.
+for k in range(len(LOCATIONS)):
+    for i in range(len(LOCATIONS)):
+        for j in range(len(LOCATIONS)):
+            DIST[i][j] = min(DIST[i][j], DIST[i][k] + DIST[k][j])
+DIST = tuple(tuple(row) for row in DIST)
+assert all(d != INF for row in DIST for d in row), "every location must be reachable"
+
+def cost_per_km(weight_g):
+    # 10 per km up to 5 kg, plus 8 for every started 5 kg block beyond that (integer grams).
+    if weight_g <= 5000:
+        return 10
+    return 10 + 8 * ((weight_g - 5001) // 5000 + 1)
 
 def generate_all_routes(centers):
     """Generate all center permutations and all drop positions (L1 insertions)."""
@@ -321,83 +335,134 @@ def generate_all_routes(centers):
             routes.append(route)
     return routes
 
-def calculate_cost_for_route(route, weight_from_center):
-    carried_weight = 0.0
-    cost = 0.0
-    picked_centers = set()
-    loc_from = route[0]
-
-    if loc_from == "L1":
-        return float('inf')  # Can't start from L1
+# Only 7 non-empty center subsets exist, so every candidate route is built once at import.
+# Subsets are keyed by their center bitmask (bit i = CENTERS[i]).
+ROUTES_BY_SUBSET = {
+    sum(1 << LOC_IDX[c] for c in subset): tuple(tuple(LOC_IDX[loc] for loc in route) for route in generate_all_routes(list(subset)))
+    for r in range(1, len(CENTERS) + 1)
+    for subset in itertools.combinations(CENTERS, r)
+}
 
-    if loc_from in CENTERS:
-        carried_weight += weight_from_center[loc_from]
-        picked_centers.add(loc_from)
+def compile_route(route, dist_table):
+    """Reduce a route to (km, load) terms: total distance driven with each carried-center bitmask."""
+    km_by_load = {}
+    loc_from = route[0]
+    load = picked = 1 << loc_from
 
     for loc_to in route[1:]:
-        dist = get_distance(loc_from, loc_to)
-        cost += calculate_segment_cost(carried_weight, dist)
+        km_by_load[load] = km_by_load.get(load, 0.0) + dist_table[loc_from][loc_to]
 
-        if loc_to == "L1":
-            carried_weight = 0.0  # Delivered everything
-        elif loc_to in CENTERS and loc_to not in picked_centers:
-            carried_weight += weight_from_center[loc_to]
-            picked_centers.add(loc_to)
+        bit = 1 << loc_to
+        if loc_to == L1_IDX:
+            load = 0  # Delivered everything
+        elif not picked & bit:
+            load |= bit
+            picked |= bit
 
         loc_from = loc_to
 
-    return cost
+    return tuple((km, load) for load, km in sorted(km_by_load.items()))
+
+# Carrying more centers never lowers cost per km, so any cost table is a non-negative
+# function that is monotone in the load bitmask. Such a function is a non-negative mix of
+# indicators of up-closed load families, so plan a is never worse than plan b if it drives
+# no more km than b within every up-closed family.
+LOADS = range(1 << len(CENTERS))
+UP_SETS = [
+    up for up in (frozenset(load for load in LOADS if family >> load & 1) for family in range(1 << len(LOADS)))
+    if all(load | other in up for load in up for other in LOADS)
+]
+
+def plan_dominates(a, b):
+    km_a = {load: km for km, load in a}
+    km_b = {load: km for km, load in b}
+    return all(
+        sum(km_a.get(load, 0.0) for load in up) <= sum(km_b.get(load, 0.0) for load in up)
+        for up in UP_SETS
+    )
+
+def prune_dominated(plans):
+    """Drop plans that some other, non-equivalent plan never costs more than, whatever the weights."""
+    return tuple(
+        plan for plan in plans
+        if not any(plan_dominates(other, plan) and not plan_dominates(plan, other) for other in plans)
+    )
+
+# A route's cost is the dot product of its km-per-load vector with the request's cost-per-km
+# table, so routes sharing a vector are interchangeable and only one copy is kept.
+ROUTE_PLANS_BY_SUBSET = {
+    subset: prune_dominated(tuple(dict.fromkeys(compile_route(route, DIST) for route in routes)))
+    for subset, routes in ROUTES_BY_SUBSET.items()
+}
 
-def _calculate_overall_minimum_cost(order_data):
-    involved_centers = set()
-    weight_from_center = {c: 0.0 for c in CENTERS}
+def calculate_cost_for_route(plan, cpk_by_load):
+    return sum(cpk_by_load[load] * dist for dist, load in plan)
 
-    for product, qty in order_data.items():
-        if qty <= 0 or product not in PRODUCTS:
-            continue
-        center = PRODUCTS[product]["center"]
-        weight = PRODUCTS[product]["weight"] * qty
-        weight_from_center[center] += weight
-        involved_centers.add(center)
+def _calculate_overall_minimum_cost(involved, weights):
+    # Quantize to whole grams so identical orders share a hashable cache key.
+    return _cost_by_weights(involved, *(round(w * 1000) for w in weights))
+
+@functools.lru_cache(maxsize=4096)
+def _cost_by_weights(involved, w_c1, w_c2, w_c3):
+    weights = (w_c1, w_c2, w_c3)
 
-    if not involved_centers:
-        return 0, None
+    # Carried weight can only be one of the subset sums, so price each load once.
+    cpk_by_load = [
+        cost_per_km(sum(w for i, w in enumerate(weights) if load & (1 << i)))
+        for load in range(1 << len(CENTERS))
+    ]
 
-    all_routes = generate_all_routes(list(involved_centers))
+    # map/min run the outer loop and the reduction in C.
+    plans = ROUTE_PLANS_BY_SUBSET[involved]
+    return round(min(map(calculate_cost_for_route, plans, itertools.repeat(cpk_by_load))))
 
-    min_cost = float('inf')
-    for route in all_routes:
-        cost = calculate_cost_for_route(route, weight_from_center)
-        min_cost = min(min_cost, cost)
+# Success bodies are fixed-shape, so they are formatted directly instead of serialized.
+_OK_TEMPLATE = b'{"minimum_cost":%d}'
+_HEALTH_BODY = b'{"message":"API is up"}'
 
-    if min_cost == float('inf'):
-        return None, "No valid delivery route found"
-    return round(min_cost), None
+def _json_response(body, status=200):
+    return app.response_class(body, status=status, mimetype="application/json")
 
 @app.route("/", methods=["POST"])
 def calculate_cost():
-    if not request.is_json:
+    # This endpoint only speaks plain application/json; compare the media type (MIME types are
+    # case-insensitive) directly from the environ instead of going through Werkzeug's parser.
+    content_type = request.environ.get("CONTENT_TYPE", "")
+    if content_type.partition(";")[0].strip().lower() != "application/json":
         return jsonify({"error": "Content-Type must be application/json"}), 415
 
-    order = request.get_json()
+    try:
+        order = orjson.loads(request.get_data())
+    except orjson.JSONDecodeError:
+        return jsonify({"error": "Request body must be valid JSON"}), 400
     if not isinstance(order, dict):
         return jsonify({"error": "Request must be a JSON object with product quantities"}), 400
 
-    validated_order = {}
+    # Validate and accumulate per-center weights in a single pass over the order.
+    weights = [0.0] * len(CENTERS)
+    involved = 0
     for product, qty in order.items():
-        if product not in PRODUCTS:
+        center_idx = PRODUCT_CENTER.get(product)
+        if center_idx is None:
             continue
-        if isinstance(qty, int) and qty > 0:
-            validated_order[product] = qty
+        # orjson decodes integers beyond 64 bits as floats; refuse them instead of skipping.
+        if isinstance(qty, float) and qty >= 2 ** 64:
+            return jsonify({"error": f"Quantity for product {product} is too large"}), 400
+        if not isinstance(qty, int) or qty <= 0:
+            continue
+        weights[center_idx] += PRODUCT_WEIGHT[product] * qty
+        involved |= 1 << center_idx
 
-    if not validated_order:
-        return jsonify({"minimum_cost": 0}), 200
+    if not involved:
+        return _json_response(_OK_TEMPLATE % 0)
 
-    cost, error = _calculate_overall_minimum_cost(validated_order)
-    if error:
-        return jsonify({"error": error}), 400
-    return jsonify({"minimum_cost": cost}), 200
+    return _json_response(_OK_TEMPLATE % _calculate_overall_minimum_cost(involved, weights))
 
 @app.route("/", methods=["GET"])
 def health_check():
-    return jsonify({"message": "API is up"}), 200
+    return _json_response(_HEALTH_BODY)
+
+def warm_up():
+    """Serve one request so Flask's lazy first-request setup is paid before real traffic."""
+    with app.test_client() as client:
+        client.post("/", json={"A": 1})
@@ -0,0 +1,4 @@
+def post_worker_init(worker):
+    # Warm each worker once the app is fully configured, not at import time.
+    from api import warm_up
+    warm_up()